@@ -8,6 +8,7 @@ from tools.media_tools import MEDIA_TOOLS
 from tools.web_tools import WEB_TOOLS
 from tools.information_tools import INFORMATION_TOOLS  # <-- IMPORT NEW
 from tools.communication_tools import COMMUNICATION_TOOLS # <-- IMPORT NEW
+from tools.network_monitor import get_monitor
 
 class Jarvis(Agent):
     """
@@ -40,6 +41,7 @@ class Jarvis(Agent):
     async def on_enter(self):
         """
         This function is called when the agent first joins the session.
-        It speaks the initial greeting.
+        It starts the background network monitor and speaks the initial greeting.
         """
+        get_monitor()
         await self.say("Jarvis is online. How can I assist you?")
@@ -10,6 +10,7 @@ from livekit.plugins import deepgram, elevenlabs, openai, silero
 
 # Import the Jarvis agent definition
 from jarvis_agent import Jarvis
+from tools.network_monitor import stop_monitor
 
 # Load environment variables from the .env file in the project root
 # This makes sure all API keys are available as environment variables
@@ -25,6 +26,9 @@ logger = logging.getLogger("jarvis-main")
 async def entrypoint(ctx: JobContext):
     logger.info(f"Starting Jarvis job for room: {ctx.room.name}")
 
+    # Stop the background network monitor and kill any running speed test when this job ends.
+    ctx.add_shutdown_callback(stop_monitor)
+
     # 1. Create an instance of our Jarvis agent
     agent = Jarvis()
 
@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import sys
+from pathlib import Path
+
+# Make the backend modules (e.g. `tools`) importable when running pytest from anywhere.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
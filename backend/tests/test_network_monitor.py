@@ -0,0 +1,209 @@
+# tests/test_network_monitor.py
+
+import sys
+import time
+import socket
+import asyncio
+
+import pytest
+
+from tools import network_monitor
+from tools.network_monitor import NetworkMonitor, parse_targets
+
+
+async def start_probe_server():
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def closed_port_socket(port=0):
+    # Bound but not listening, so connects are refused and the port can't be handed out again.
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", port))
+    return sock
+
+
+def speedtest_command(code):
+    return lambda: [sys.executable, "-c", code]
+
+
+@pytest.fixture(autouse=True)
+def reset_speedtest_cooldown(monkeypatch):
+    monkeypatch.setattr(network_monitor, "_last_speedtest_start", 0.0)
+
+
+def make_monitor(targets, **kwargs):
+    options = dict(interval=0.01, timeout=0.5, window=5, speedtest_cooldown=60)
+    options.update(kwargs)
+    return NetworkMonitor(targets=targets, **options)
+
+
+def test_parse_targets():
+    assert parse_targets("127.0.0.1:9000, [::1]:443,") == [("127.0.0.1", 9000), ("::1", 443)]
+    for raw in ("foo", "host:", "host:0", "host:70000", "", " , "):
+        with pytest.raises(ValueError):
+            parse_targets(raw)
+
+
+def test_invalid_env_falls_back_to_defaults(monkeypatch):
+    monkeypatch.setenv("NETWORK_PROBE_TARGETS", "foo")
+    monkeypatch.setenv("NETWORK_PROBE_INTERVAL", "0")
+    monkeypatch.setenv("NETWORK_PROBE_TIMEOUT", "abc")
+    monkeypatch.setenv("NETWORK_PROBE_WINDOW", "-3")
+    monitor = NetworkMonitor()
+    assert monitor.targets == parse_targets(network_monitor.DEFAULT_PROBE_TARGETS)
+    assert monitor.interval == network_monitor.DEFAULT_PROBE_INTERVAL
+    assert monitor.timeout == network_monitor.DEFAULT_PROBE_TIMEOUT
+    assert monitor.samples[monitor.targets[0]].maxlen == network_monitor.DEFAULT_WINDOW_SIZE
+
+
+def test_stats_for_up_and_down_targets():
+    async def run():
+        server, port = await start_probe_server()
+        monitor = make_monitor([("127.0.0.1", port)])
+        for _ in range(3):
+            await monitor.probe_once()
+        up = monitor.stats()
+        assert up["samples"] == 3
+        assert up["loss_pct"] == 0
+        assert up["rtt_ms"] is not None and up["jitter_ms"] is not None
+
+        server.close()
+        await server.wait_closed()
+        # Once the window has rolled over, no RTT from before the outage may remain.
+        for _ in range(5):
+            await monitor.probe_once()
+        down = monitor.stats()
+        assert down["targets"][0]["loss_pct"] == 100
+        assert down["rtt_ms"] is None and down["jitter_ms"] is None
+        assert down["unreachable"] == [f"127.0.0.1:{port}"]
+        assert monitor.summary().startswith("Network appears to be down")
+
+    asyncio.run(run())
+
+
+def test_partial_loss():
+    async def run():
+        server, port = await start_probe_server()
+        monitor = make_monitor([("127.0.0.1", port)], window=4)
+        await monitor.probe_once()
+        await monitor.probe_once()
+        server.close()
+        await server.wait_closed()
+        # Keep the same target but hold its port closed for the next probes.
+        dead = closed_port_socket(port)
+        try:
+            await monitor.probe_once()
+            await monitor.probe_once()
+        finally:
+            dead.close()
+        stats = monitor.stats()
+        assert stats["loss_pct"] == 50
+        assert "Packet loss: 50.0%" in monitor.summary()
+
+    asyncio.run(run())
+
+
+def test_unreachable_target_is_not_counted_as_loss():
+    async def run():
+        server, port = await start_probe_server()
+        dead = closed_port_socket()
+        dead_port = dead.getsockname()[1]
+        try:
+            monitor = make_monitor([("127.0.0.1", port), ("127.0.0.1", dead_port)])
+            await monitor.probe_once()
+            await monitor.probe_once()
+        finally:
+            dead.close()
+            server.close()
+            await server.wait_closed()
+        stats = monitor.stats()
+        assert stats["loss_pct"] == 0
+        assert stats["best_target"] == f"127.0.0.1:{port}"
+        assert stats["unreachable"] == [f"127.0.0.1:{dead_port}"]
+        assert f"Unreachable probe targets: 127.0.0.1:{dead_port}" in monitor.summary()
+
+    asyncio.run(run())
+
+
+def test_jitter_unknown_with_one_sample():
+    async def run():
+        server, port = await start_probe_server()
+        monitor = make_monitor([("127.0.0.1", port)])
+        await monitor.probe_once()
+        server.close()
+        await server.wait_closed()
+        assert "Jitter: not known yet" in monitor.summary()
+
+    asyncio.run(run())
+
+
+def test_wait_ready_uses_background_round():
+    async def run():
+        server, port = await start_probe_server()
+        monitor = make_monitor([("127.0.0.1", port)], interval=10)
+        monitor.start()
+        await asyncio.wait_for(monitor.wait_ready(), 2)
+        assert monitor.stats()["samples"] == 1
+        await monitor.stop()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_speedtest_rate_limit(monkeypatch):
+    async def run():
+        monitor = make_monitor([("127.0.0.1", 1)])
+        monkeypatch.setattr(monitor, "_speedtest_command", speedtest_command(
+            "print('{\"ping\": 10.0, \"download\": 100000000, \"upload\": 20000000}')"))
+        assert monitor.request_speedtest().startswith("Started")
+        assert "already running" in monitor.request_speedtest()
+        await monitor._speedtest_task
+        assert monitor.last_speedtest[1:] == (10.0, 100.0, 20.0)
+        assert "next one is allowed" in monitor.request_speedtest()
+        assert "Download 100.00 Mbps" in monitor.summary()
+
+        # The cooldown survives the shared monitor being recreated for a new job.
+        assert "next one is allowed" in make_monitor([("127.0.0.1", 1)]).request_speedtest()
+
+    asyncio.run(run())
+
+
+def test_failed_speedtest_is_reported_and_can_retry(monkeypatch):
+    async def run():
+        monitor = make_monitor([("127.0.0.1", 1)])
+        monitor.last_speedtest = (time.time(), 10.0, 100.0, 20.0)
+        monkeypatch.setattr(monitor, "_speedtest_command", speedtest_command(
+            "import sys; sys.exit('ERROR: no servers')"))
+        monitor.request_speedtest()
+        await monitor._speedtest_task
+        summary = monitor.summary()
+        assert "Download 100.00 Mbps" in summary
+        assert "A later speed test failed" in summary and "no servers" in summary
+        assert monitor.request_speedtest().startswith("Started")
+        await monitor.stop()
+
+    asyncio.run(run())
+
+
+def test_stop_kills_running_speedtest(monkeypatch, tmp_path):
+    marker = tmp_path / "finished"
+    monitor = make_monitor([("127.0.0.1", 1)])
+    monkeypatch.setattr(monitor, "_speedtest_command", speedtest_command(
+        f"import time; time.sleep(3); open({str(marker)!r}, 'w').close()"))
+
+    async def run():
+        monitor.start()
+        monitor.request_speedtest()
+        await asyncio.sleep(0.3)
+        probe_task, speedtest_task = monitor._task, monitor._speedtest_task
+        await monitor.stop()
+        assert probe_task.cancelled() and speedtest_task.cancelled()
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - started < 2
+    time.sleep(3.5)
+    assert not marker.exists()
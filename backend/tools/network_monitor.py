@@ -0,0 +1,332 @@
+# tools/network_monitor.py
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import logging
+import statistics
+from collections import deque
+
+import psutil
+
+logger = logging.getLogger("jarvis-network")
+
+# --- Configuration ---
+# Probe targets are "host:port" pairs. A probe is a plain TCP connect, so any reachable
+# listener works (including a local test server, e.g. NETWORK_PROBE_TARGETS="127.0.0.1:9000").
+DEFAULT_PROBE_TARGETS = "1.1.1.1:443,8.8.8.8:443"
+DEFAULT_PROBE_INTERVAL = 2.0      # seconds between probe rounds
+DEFAULT_PROBE_TIMEOUT = 1.5       # seconds before a probe counts as lost
+DEFAULT_WINDOW_SIZE = 60          # samples kept per rolling statistic
+DEFAULT_SPEEDTEST_COOLDOWN = 900  # minimum seconds between full speed tests
+
+
+def parse_targets(raw: str) -> list[tuple[str, int]]:
+    """Parses a comma separated "host:port" list into (host, port) tuples."""
+    targets = []
+    for item in raw.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":")
+        if not host or not port.isdigit() or not 1 <= int(port) <= 65535:
+            raise ValueError(f"Invalid probe target '{item}', expected host:port with a port from 1 to 65535.")
+        targets.append((host.strip("[]"), int(port)))
+    if not targets:
+        raise ValueError("No probe targets configured.")
+    return targets
+
+
+def _env_number(name: str, default, cast=float):
+    """Reads a positive number from the environment, falling back to the default if it is invalid."""
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        value = None
+    if value is None or value <= 0:
+        logger.warning(f"Ignoring invalid {name}={raw!r}, using default {default}.")
+        return default
+    return value
+
+
+def _is_loopback(name: str, stats) -> bool:
+    flags = getattr(stats, "flags", "") if stats is not None else ""
+    if "loopback" in flags.split(","):
+        return True
+    # Name fallback for platforms without interface flags: "lo" (Linux), "lo0" (macOS), "Loopback ..." (Windows).
+    return name == "lo" or (name.startswith("lo") and name[2:].isdigit()) or name.startswith("Loopback")
+
+
+class NetworkMonitor:
+    """Keeps rolling RTT, jitter, loss and interface throughput statistics.
+
+    Probes are small TCP connects run in the background, so reading the stats is instant.
+    The full speed test is only run on request, in a subprocess that can be killed, and rate limited.
+    """
+
+    def __init__(self, targets=None, interval=None, timeout=None, window=None, speedtest_cooldown=None):
+        if targets is None:
+            try:
+                targets = parse_targets(os.environ.get("NETWORK_PROBE_TARGETS", DEFAULT_PROBE_TARGETS))
+            except ValueError as e:
+                logger.warning(f"{e} Using default probe targets {DEFAULT_PROBE_TARGETS}.")
+                targets = parse_targets(DEFAULT_PROBE_TARGETS)
+        if not targets:
+            raise ValueError("No probe targets configured.")
+        self.targets = targets
+        self.interval = interval if interval is not None else _env_number(
+            "NETWORK_PROBE_INTERVAL", DEFAULT_PROBE_INTERVAL)
+        self.timeout = timeout if timeout is not None else _env_number(
+            "NETWORK_PROBE_TIMEOUT", DEFAULT_PROBE_TIMEOUT)
+        window = window if window is not None else _env_number(
+            "NETWORK_PROBE_WINDOW", DEFAULT_WINDOW_SIZE, int)
+        self.speedtest_cooldown = speedtest_cooldown if speedtest_cooldown is not None else _env_number(
+            "SPEEDTEST_COOLDOWN", DEFAULT_SPEEDTEST_COOLDOWN)
+        if self.interval <= 0 or self.timeout <= 0 or window <= 0:
+            raise ValueError("Probe interval, timeout and window must be positive.")
+
+        # Per target: the RTT in ms of each recent probe, or None if it was lost.
+        self.samples = {target: deque(maxlen=window) for target in self.targets}
+        # (download, upload) in bits per second, derived from interface counters.
+        self.throughput = deque(maxlen=window)
+
+        self._last_counters = None
+        self._task = None
+        self._first_round = asyncio.Event()
+        self._speedtest_task = None
+        self.last_speedtest = None        # (timestamp, ping_ms, download_mbps, upload_mbps)
+        self.last_speedtest_error = None  # (timestamp, message) of a failed run newer than last_speedtest
+
+    # --- Probing ---
+
+    async def probe(self, host: str, port: int):
+        """Measures one TCP connect round trip in ms, or returns None if it failed."""
+        # Resolve before starting the clock so DNS lookups don't count as latency.
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await asyncio.wait_for(
+                loop.getaddrinfo(host, port, type=socket.SOCK_STREAM), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        address = infos[0][4][0]
+
+        start = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        rtt = (time.perf_counter() - start) * 1000
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return rtt
+
+    def sample_counters(self):
+        """Records throughput since the previous call from the non-loopback interface counters."""
+        counters = psutil.net_io_counters(pernic=True)
+        if_stats = psutil.net_if_stats()
+        received = sent = 0
+        for name, nic in counters.items():
+            if _is_loopback(name, if_stats.get(name)):
+                continue
+            received += nic.bytes_recv
+            sent += nic.bytes_sent
+        now = time.monotonic()
+        if self._last_counters is not None:
+            last_time, last_recv, last_sent = self._last_counters
+            elapsed = now - last_time
+            # Counters can wrap or reset when an adapter goes down; skip that sample.
+            if elapsed > 0 and received >= last_recv and sent >= last_sent:
+                self.throughput.append(((received - last_recv) * 8 / elapsed,
+                                        (sent - last_sent) * 8 / elapsed))
+        self._last_counters = (now, received, sent)
+
+    async def probe_once(self):
+        """Runs one probe round against every target and samples the interface counters."""
+        results = await asyncio.gather(*(self.probe(host, port) for host, port in self.targets))
+        for target, rtt in zip(self.targets, results):
+            self.samples[target].append(rtt)
+        self.sample_counters()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.warning(f"Network probe round failed: {e}")
+            self._first_round.set()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Starts the background probe loop on the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def wait_ready(self):
+        """Waits until the background loop has finished its first probe round."""
+        await self._first_round.wait()
+
+    async def stop(self):
+        """Cancels the probe loop and kills any speed test subprocess still running."""
+        for task in (self._task, self._speedtest_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._speedtest_task = None
+
+    # --- Statistics ---
+
+    def target_stats(self, target) -> dict:
+        """Returns the rolling statistics of a single probe target."""
+        samples = self.samples[target]
+        rtts = [rtt for rtt in samples if rtt is not None]
+        # Jitter as the mean absolute difference between consecutive RTTs (RFC 3550 style).
+        diffs = [abs(b - a) for a, b in zip(rtts, rtts[1:])]
+        return {
+            "target": f"{target[0]}:{target[1]}",
+            "samples": len(samples),
+            "rtt_ms": statistics.median(rtts) if rtts else None,
+            "rtt_min_ms": min(rtts) if rtts else None,
+            "jitter_ms": statistics.fmean(diffs) if diffs else None,
+            "loss_pct": (100 * (len(samples) - len(rtts)) / len(samples)) if samples else None,
+        }
+
+    def stats(self) -> dict:
+        """Returns the current rolling statistics.
+
+        Latency, jitter and loss are those of the best reachable target, so a target that is
+        blocked on this network doesn't show up as packet loss. Targets without a single
+        successful probe in the window are listed as unreachable instead.
+        """
+        per_target = [self.target_stats(target) for target in self.targets]
+        reachable = [t for t in per_target if t["rtt_ms"] is not None]
+        best = min(reachable, key=lambda t: (t["loss_pct"], t["rtt_ms"])) if reachable else None
+
+        result = {
+            "samples": sum(t["samples"] for t in per_target),
+            "targets": per_target,
+            "best_target": best["target"] if best else None,
+            "unreachable": [t["target"] for t in per_target if t["samples"] and t["rtt_ms"] is None],
+            "rtt_ms": best["rtt_ms"] if best else None,
+            "rtt_min_ms": best["rtt_min_ms"] if best else None,
+            "jitter_ms": best["jitter_ms"] if best else None,
+            "loss_pct": best["loss_pct"] if best else None,
+            "best_samples": best["samples"] if best else 0,
+            "download_mbps": None,
+            "upload_mbps": None,
+            "peak_download_mbps": None,
+            "peak_upload_mbps": None,
+        }
+        if self.throughput:
+            downloads = [down for down, _ in self.throughput]
+            uploads = [up for _, up in self.throughput]
+            result["download_mbps"] = statistics.fmean(downloads) / 1_000_000
+            result["upload_mbps"] = statistics.fmean(uploads) / 1_000_000
+            result["peak_download_mbps"] = max(downloads) / 1_000_000
+            result["peak_upload_mbps"] = max(uploads) / 1_000_000
+        return result
+
+    def summary(self) -> str:
+        """Describes the current network quality in a few sentences."""
+        s = self.stats()
+        if not s["samples"]:
+            text = "Network monitor is still collecting its first samples."
+        elif s["rtt_ms"] is None:
+            text = f"Network appears to be down: all {s['samples']} recent probes failed."
+        else:
+            jitter = f"{s['jitter_ms']:.1f} ms" if s["jitter_ms"] is not None else "not known yet"
+            text = (f"Latency: {s['rtt_ms']:.1f} ms, Jitter: {jitter}, "
+                    f"Packet loss: {s['loss_pct']:.1f}% over {s['best_samples']} probes to {s['best_target']}.")
+            if s["unreachable"]:
+                text += f" Unreachable probe targets: {', '.join(s['unreachable'])}."
+            if s["download_mbps"] is not None:
+                text += (f" Current traffic: {s['download_mbps']:.2f} Mbps down, {s['upload_mbps']:.2f} Mbps up"
+                         f" (peak {s['peak_download_mbps']:.2f} / {s['peak_upload_mbps']:.2f} Mbps).")
+        if self._speedtest_task is not None and not self._speedtest_task.done():
+            text += " A full speed test is running in the background."
+        if self.last_speedtest is not None:
+            finished, ping, download, upload = self.last_speedtest
+            minutes = int((time.time() - finished) // 60)
+            text += (f" Last full speed test ({minutes} min ago): Ping {ping:.2f} ms, "
+                     f"Download {download:.2f} Mbps, Upload {upload:.2f} Mbps.")
+        if self.last_speedtest_error is not None:
+            failed, message = self.last_speedtest_error
+            minutes = int((time.time() - failed) // 60)
+            label = "A later speed test" if self.last_speedtest is not None else "The last full speed test"
+            text += f" {label} failed ({minutes} min ago): {message}."
+        return text
+
+    # --- Full speed test ---
+
+    def _speedtest_command(self) -> list[str]:
+        return [sys.executable, "-m", "speedtest", "--json"]
+
+    async def _speedtest_job(self):
+        # speedtest-cli runs in its own process (not a thread) so stop() can actually end it.
+        global _last_speedtest_start
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self._speedtest_command(), stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            stdout, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode(errors="replace").strip() or f"exit code {process.returncode}")
+            res = json.loads(stdout)
+            self.last_speedtest = (time.time(), res['ping'], res['download'] / 1_000_000, res['upload'] / 1_000_000)
+            self.last_speedtest_error = None
+        except asyncio.CancelledError:
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+        except Exception as e:
+            logger.warning(f"Speed test failed: {e}")
+            self.last_speedtest_error = (time.time(), str(e))
+            # Only completed runs count towards the cooldown, so a failure can be retried right away.
+            _last_speedtest_start = 0.0
+
+    def request_speedtest(self) -> str:
+        """Starts a full speed test in the background, unless one is running or ran recently."""
+        global _last_speedtest_start
+        if self._speedtest_task is not None and not self._speedtest_task.done():
+            return "A speed test is already running in the background."
+        remaining = _last_speedtest_start + self.speedtest_cooldown - time.monotonic()
+        if _last_speedtest_start and remaining > 0:
+            return f"A speed test was run recently; the next one is allowed in {int(remaining) + 1} seconds."
+        _last_speedtest_start = time.monotonic()
+        self._speedtest_task = asyncio.get_running_loop().create_task(self._speedtest_job())
+        return "Started a full speed test in the background. Ask again for the network status in about 30 seconds."
+
+
+# Start time of the latest speed test. Kept at module level so the rate limit survives
+# the monitor being recreated for each job in the same worker process.
+_last_speedtest_start = 0.0
+
+# Shared monitor used by the agent's tools, created lazily so env vars from .env are applied.
+_monitor = None
+
+def get_monitor() -> NetworkMonitor:
+    global _monitor
+    if _monitor is None:
+        _monitor = NetworkMonitor()
+    _monitor.start()
+    return _monitor
+
+async def stop_monitor():
+    """Stops the shared monitor; registered as a job shutdown callback in main.py."""
+    global _monitor
+    if _monitor is not None:
+        await _monitor.stop()
+        _monitor = None
@@ -6,11 +6,12 @@ import subprocess
 import socket
 import webbrowser
 import requests
-import speedtest
 
 from livekit.agents.llm import function_tool
 from typing import Annotated, Literal
 
+from tools.network_monitor import get_monitor
+
 # --- Tool Registration ---
 WEB_TOOLS = []
 
@@ -52,19 +53,22 @@ async def open_website(site_name: Annotated[str, "The common name of the website
 @register_tool
 @function_tool
 async def get_internet_speed() -> str:
-    """Performs an internet speed test to check download, upload, and ping."""
+    """Reports current internet quality (latency, jitter, packet loss, throughput) from the background network monitor."""
+    try:
+        monitor = get_monitor()
+        await monitor.wait_ready()
+        return f"Success: {monitor.summary()}"
+    except Exception as e:
+        return f"Error: Could not read network status. Details: {e}"
+
+@register_tool
+@function_tool
+async def run_speed_test() -> str:
+    """Starts a full download/upload speed test in the background. Only use when the user explicitly asks for a full speed test."""
     try:
-        st = speedtest.Speedtest()
-        st.get_best_server()
-        st.download()
-        st.upload()
-        res = st.results.dict()
-        ping = res['ping']
-        download = res['download'] / 1_000_000
-        upload = res['upload'] / 1_000_000
-        return f"Success: Ping: {ping:.2f} ms, Download: {download:.2f} Mbps, Upload: {upload:.2f} Mbps"
+        return get_monitor().request_speedtest()
     except Exception as e:
-        return f"Error: Could not perform speed test. Details: {e}"
+        return f"Error: Could not start speed test. Details: {e}"
 
 @register_tool
 @function_tool